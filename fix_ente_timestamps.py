@@ -7,14 +7,38 @@ capture time from companion JSON metadata files and applying them using exiftool
 """
 
 import argparse
+import atexit
+import contextlib
+import ctypes
+import ctypes.util
+import io
 import json
+import multiprocessing.util
+import os
+import queue
+import re
 import shutil
+import sqlite3
 import subprocess
 import sys
-import tempfile
-from datetime import datetime
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# orjson parses the metadata sidecars several times faster when installed
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Map exiftool FileType to canonical extension
 FILETYPE_TO_EXT = {
@@ -50,6 +74,229 @@ EXT_ALIASES = {
     ".tif": ".tiff",
 }
 
+# (current, detected) extension pairs naming the same format, so checking an
+# extension is a single set lookup
+_KNOWN_EXTS = {*FILETYPE_TO_EXT.values(), *EXT_ALIASES, *EXT_ALIASES.values()}
+EQUIVALENT_EXTS = frozenset(
+    (a, b)
+    for a in _KNOWN_EXTS
+    for b in _KNOWN_EXTS
+    if EXT_ALIASES.get(a, a) == EXT_ALIASES.get(b, b)
+)
+
+# Leading bytes of common formats, checked before asking exiftool. TIFF is
+# left out on purpose: CR2, NEF, ARW and DNG share its header, so only
+# exiftool can tell a RAW file misnamed .tif apart from a real TIFF
+MAGIC_BYTES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+]
+
+# ISO media "ftyp" major brands (bytes 8-12) to extension
+FTYP_BRANDS = {
+    b"heic": ".heic",
+    b"heix": ".heic",
+    b"hevc": ".heic",
+    b"hevx": ".heic",
+    b"isom": ".mp4",
+    b"iso2": ".mp4",
+    b"mp41": ".mp4",
+    b"mp42": ".mp4",
+    b"avc1": ".mp4",
+    b"M4V ": ".mp4",
+    b"qt  ": ".mov",
+}
+
+# RIFF form types (bytes 8-12) to extension
+RIFF_TYPES = {
+    b"WEBP": ".webp",
+    b"AVI ": ".avi",
+}
+
+# Where detected file types are remembered between runs
+DEFAULT_CACHE_DB = "~/.cache/ente-migrate/types.sqlite"
+
+# Max paths per SELECT, below SQLite's host parameter limit
+CACHE_QUERY_CHUNK = 500
+
+# Number of threads used to copy files within an album
+COPY_WORKERS = 8
+
+# Number of threads used to read metadata sidecars within an album
+METADATA_READ_WORKERS = 16
+
+# Containers AtomicParsley can date, and how many to patch at once
+VIDEO_EXTS = {".mp4", ".m4v", ".mov"}
+VIDEO_WORKERS = 4
+
+# Linux ioctl that reflinks one file into another (Btrfs, XFS)
+FICLONE = 0x40049409
+
+# macOS clonefile(2), for copy-on-write copies on APFS
+_clonefile = None
+if sys.platform == "darwin":
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _clonefile = _libc.clonefile
+        _clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+        _clonefile.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _clonefile = None
+
+# Sentinel exiftool prints once a -stay_open command has finished
+EXIFTOOL_READY = b"{ready}"
+
+# Ends one command in a -stay_open argfile. -echo4 also writes the sentinel
+# to stderr once the command completes, so stderr can be split per command
+EXIFTOOL_EXECUTE = b"-echo4\n" + EXIFTOOL_READY + b"\n-execute\n"
+
+# Date tags written per extension, pre-encoded for the argfile. Videos
+# carry no EXIF, so only their QuickTime CreateDate is set
+_IMAGE_DATE_ARGS = (b"-DateTimeOriginal=", b"-CreateDate=")
+_VIDEO_DATE_ARGS = (b"-QuickTime:CreateDate=",)
+DATE_ARGS_BY_EXT = {
+    ".mp4": _VIDEO_DATE_ARGS,
+    ".m4v": _VIDEO_DATE_ARGS,
+    ".mov": _VIDEO_DATE_ARGS,
+}
+
+# Formats exiftool can't write; these only get filesystem times
+UNWRITABLE_EXTS = {".bmp", ".avi", ".mkv", ".webm"}
+
+# exiftool's per-command summary, e.g. "    1 image files updated"
+_SUMMARY_RE = re.compile(r"(\d+) image files (updated|unchanged)")
+
+
+class ExiftoolDaemon:
+    """
+    A single long-lived exiftool process driven via -stay_open.
+
+    Arguments are written to exiftool's stdin as argfile lines, so the Perl
+    interpreter only starts once per run instead of once per batch.
+    """
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            ["exiftool", "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Drain stderr in the background so a flood of warnings can't fill
+        # the pipe and stall exiftool while we're waiting on stdout
+        self._stderr_blocks: queue.Queue[bytes] = queue.Queue()
+        threading.Thread(target=self._drain_stderr, daemon=True).start()
+
+    def _drain_stderr(self) -> None:
+        lines = []
+        for line in self._process.stderr:
+            if line.rstrip(b"\r\n") == EXIFTOOL_READY:
+                self._stderr_blocks.put(b"".join(lines))
+                lines = []
+            else:
+                lines.append(line)
+
+    def _write(self, payload: bytes) -> None:
+        try:
+            self._process.stdin.write(payload)
+            self._process.stdin.flush()
+        except OSError:
+            # exiftool went away; execute() notices when stdout hits EOF
+            pass
+
+    def execute(self, args: list[str]) -> tuple[str, str]:
+        """
+        Run exiftool with the given arguments and wait for it to finish.
+        "-execute" may appear in args to separate several commands.
+        Returns (stdout, stderr).
+        """
+        payload = bytearray()
+        for arg in args:
+            if arg == "-execute":
+                payload += EXIFTOOL_EXECUTE
+            else:
+                payload += os.fsencode(arg) + b"\n"
+        payload += EXIFTOOL_EXECUTE
+        return self.execute_argfile(payload)
+
+    def execute_argfile(
+        self,
+        argfile: bytes,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> tuple[str, str]:
+        """
+        Run a pre-built argfile whose commands each end with EXIFTOOL_EXECUTE
+        and wait for them to finish. Output is read as exiftool produces it,
+        calling on_progress with the number of commands completed so far.
+        Returns (stdout, stderr).
+        """
+        commands = argfile.count(EXIFTOOL_EXECUTE)
+
+        # Write from a separate thread: large argfiles can exceed the pipe
+        # buffer while exiftool is already blocked writing its own output
+        writer = threading.Thread(target=self._write, args=(argfile,), daemon=True)
+        writer.start()
+
+        stdout_lines = []
+        remaining = commands
+        while remaining:
+            line = self._process.stdout.readline()
+            if not line:
+                # Reap it so get_exiftool() starts a fresh daemon next time
+                self._process.wait()
+                raise RuntimeError("exiftool exited unexpectedly")
+            if line.rstrip(b"\r\n") == EXIFTOOL_READY:
+                remaining -= 1
+                if on_progress is not None:
+                    on_progress(commands - remaining)
+            else:
+                stdout_lines.append(line)
+        writer.join()
+
+        stderr = b"".join(self._stderr_blocks.get() for _ in range(commands))
+        return (
+            b"".join(stdout_lines).decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+
+    def is_alive(self) -> bool:
+        """Check if the exiftool process is still running."""
+        return self._process.poll() is None
+
+    def close(self) -> None:
+        """Ask exiftool to exit and wait for it."""
+        if self._process.poll() is None:
+            try:
+                self._process.stdin.write(b"-stay_open\nFalse\n")
+                self._process.stdin.close()
+            except OSError:
+                pass
+            self._process.wait()
+
+
+_exiftool: Optional[ExiftoolDaemon] = None
+
+
+def get_exiftool() -> ExiftoolDaemon:
+    """
+    Return the shared exiftool daemon, starting it on first use or if the
+    previous one died, so one crash doesn't fail every later album.
+    """
+    global _exiftool
+    if _exiftool is None or not _exiftool.is_alive():
+        _exiftool = ExiftoolDaemon()
+        atexit.register(_exiftool.close)
+    return _exiftool
+
+
+def close_exiftool() -> None:
+    """Shut down the shared exiftool daemon if one was started."""
+    if _exiftool is not None:
+        _exiftool.close()
+
 
 def batch_detect_file_types(files: list[Path]) -> dict[str, Optional[str]]:
     """
@@ -60,18 +307,15 @@ def batch_detect_file_types(files: list[Path]) -> dict[str, Optional[str]]:
         return {}
 
     try:
-        cmd = ["exiftool", "-FileType", "-FileName", "-json"] + [str(f) for f in files]
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if result.returncode != 0 and not result.stdout:
-            print(f"  [WARN] exiftool batch detection failed: {result.stderr.strip()}")
+        # -fast3 stops after the header, which is all FileType needs
+        args = ["-fast3", "-FileType", "-FileName", "-json"]
+        args += [str(f) for f in files]
+        stdout, stderr = get_exiftool().execute(args)
+        if not stdout.strip():
+            print(f"  [WARN] exiftool batch detection failed: {stderr.strip()}")
             return {}
 
-        data = json.loads(result.stdout)
+        data = json.loads(stdout)
         type_map = {}
         for item in data:
             filename = item.get("FileName", "")
@@ -90,6 +334,106 @@ def batch_detect_file_types(files: list[Path]) -> dict[str, Optional[str]]:
         return {}
 
 
+def quick_sniff(filepath: Path) -> Optional[str]:
+    """
+    Guess a file's extension from its first bytes, without exiftool.
+    Returns the extension or None if the format isn't recognized.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            header = f.read(16)
+    except OSError:
+        return None
+
+    if header[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(header[8:12])
+    if header.startswith(b"RIFF"):
+        return RIFF_TYPES.get(header[8:12])
+    for magic, ext in MAGIC_BYTES:
+        if header.startswith(magic):
+            return ext
+    return None
+
+
+def open_type_cache(db_path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the file type cache database."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Album workers share the database, so wait on each other's writes
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS types "
+        "(path TEXT PRIMARY KEY, size INT, mtime_ns INT, ext TEXT)"
+    )
+    return conn
+
+
+def cached_detect_file_types(
+    files: list[Path], cache_db: Optional[Path]
+) -> dict[str, Optional[str]]:
+    """
+    Like batch_detect_file_types, but reuses results from earlier runs for
+    files whose size and mtime haven't changed since.
+    Returns dict mapping filename to correct extension (or None if unknown).
+    """
+
+    def detect(to_detect: list[Path]) -> dict[str, Optional[str]]:
+        # Only announce files that actually go to exiftool
+        if not to_detect:
+            return {}
+        print(f"  Detecting file types for {len(to_detect)} files...")
+        return batch_detect_file_types(to_detect)
+
+    if cache_db is None or not files:
+        return detect(files)
+
+    try:
+        conn = open_type_cache(cache_db)
+    except (OSError, sqlite3.Error) as e:
+        print(f"  [WARN] File type cache unavailable: {e}")
+        return detect(files)
+
+    with contextlib.closing(conn):
+        stats = {}
+        for f in files:
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            stats[str(f)] = (st.st_size, st.st_mtime_ns)
+
+        type_map = {}
+        paths = list(stats)
+        for i in range(0, len(paths), CACHE_QUERY_CHUNK):
+            chunk = paths[i : i + CACHE_QUERY_CHUNK]
+            rows = conn.execute(
+                "SELECT path, size, mtime_ns, ext FROM types "
+                f"WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for path, size, mtime_ns, ext in rows:
+                if stats[path] == (size, mtime_ns):
+                    type_map[Path(path).name] = ext
+
+        misses = [f for f in files if f.name not in type_map]
+        detected = detect(misses)
+        type_map.update(detected)
+
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO types VALUES (?, ?, ?, ?)",
+                    [
+                        (str(f), *stats[str(f)], detected[f.name])
+                        for f in misses
+                        if f.name in detected and str(f) in stats
+                    ],
+                )
+        except sqlite3.Error as e:
+            print(f"  [WARN] Failed to update file type cache: {e}")
+
+    return type_map
+
+
 def get_corrected_filename(
     filepath: Path, detected_ext: Optional[str]
 ) -> tuple[str, bool]:
@@ -100,11 +444,7 @@ def get_corrected_filename(
     if detected_ext is None:
         return filepath.name, False
 
-    current_ext = filepath.suffix.lower()
-    normalized_current = EXT_ALIASES.get(current_ext, current_ext)
-    normalized_detected = EXT_ALIASES.get(detected_ext, detected_ext)
-
-    if normalized_current == normalized_detected:
+    if (filepath.suffix.lower(), detected_ext) in EQUIVALENT_EXTS:
         return filepath.name, False
 
     # Extension mismatch - return corrected filename
@@ -112,6 +452,17 @@ def get_corrected_filename(
     return new_name, True
 
 
+_datetime_cache: dict[int, datetime] = {}
+
+
+def _datetime_from_timestamp(ts: int) -> datetime:
+    """datetime.fromtimestamp, memoized since burst shots share timestamps."""
+    dt = _datetime_cache.get(ts)
+    if dt is None:
+        dt = _datetime_cache[ts] = datetime.fromtimestamp(ts)
+    return dt
+
+
 def parse_timestamp(metadata: dict) -> Optional[datetime]:
     """
     Extract timestamp from metadata, prioritizing photoTakenTime over creationTime.
@@ -121,7 +472,7 @@ def parse_timestamp(metadata: dict) -> Optional[datetime]:
     if "photoTakenTime" in metadata:
         try:
             ts = int(metadata["photoTakenTime"]["timestamp"])
-            return datetime.fromtimestamp(ts)
+            return _datetime_from_timestamp(ts)
         except (KeyError, ValueError, TypeError):
             pass
 
@@ -129,23 +480,123 @@ def parse_timestamp(metadata: dict) -> Optional[datetime]:
     if "creationTime" in metadata:
         try:
             ts = int(metadata["creationTime"]["timestamp"])
-            return datetime.fromtimestamp(ts)
+            return _datetime_from_timestamp(ts)
         except (KeyError, ValueError, TypeError):
             pass
 
     return None
 
 
+_exif_datetime_cache: dict[datetime, str] = {}
+
+
 def format_exif_datetime(dt: datetime) -> str:
     """Format datetime for exiftool (YYYY:MM:DD HH:MM:SS)."""
-    return dt.strftime("%Y:%m:%d %H:%M:%S")
+    exif_dt = _exif_datetime_cache.get(dt)
+    if exif_dt is None:
+        # f-string formatting skips strftime's format parsing
+        exif_dt = _exif_datetime_cache[dt] = (
+            f"{dt.year:04d}:{dt.month:02d}:{dt.day:02d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+        )
+    return exif_dt
+
+
+def set_file_times(
+    files_and_times: list[tuple[Path, datetime]], set_birthtime: bool = False
+) -> int:
+    """
+    Set filesystem modification times directly, and on macOS optionally the
+    creation (birth) time via SetFile.
+    Returns the number of files whose modification time couldn't be set.
+    """
+    failed = 0
+    for filepath, dt in files_and_times:
+        ts = dt.timestamp()
+        try:
+            os.utime(filepath, (ts, ts))
+        except OSError as e:
+            print(f"    [ERROR] Failed to set file time on {filepath.name}: {e}")
+            failed += 1
+
+    if not set_birthtime or sys.platform != "darwin":
+        return failed
+    if shutil.which("SetFile") is None:
+        print("  [WARN] SetFile not found, creation dates not set.")
+        print("         Install with: xcode-select --install")
+        return failed
+
+    # SetFile takes one date per call, so batch files sharing a timestamp
+    by_date: dict[str, list[str]] = {}
+    for filepath, dt in files_and_times:
+        date = dt.strftime("%m/%d/%Y %H:%M:%S")
+        by_date.setdefault(date, []).append(str(filepath))
+    for date, paths in by_date.items():
+        result = subprocess.run(
+            ["SetFile", "-d", date] + paths,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            print(f"    [WARN] SetFile failed: {result.stderr.strip()}")
+    return failed
+
+
+def atomicparsley_set_timestamps(
+    files_and_times: list[tuple[Path, datetime]],
+) -> tuple[int, int]:
+    """
+    Set the creation date of MP4/MOV files with AtomicParsley, which patches
+    the date atom in place rather than re-muxing the whole movie.
+    Returns (success_count, error_count).
+    """
+
+    def set_date(item: tuple[Path, datetime]) -> Optional[str]:
+        """Date one file, returning an error message or None on success."""
+        filepath, dt = item
+        utc = dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        try:
+            result = subprocess.run(
+                [
+                    "AtomicParsley",
+                    str(filepath),
+                    "--overWrite",
+                    "--manualAtomRemove",
+                    "moov.udta.©day",
+                    "--year",
+                    utc,
+                ],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError as e:
+            return str(e)
+        if result.returncode != 0:
+            return result.stderr.strip() or result.stdout.strip()
+        return None
+
+    with ThreadPoolExecutor(max_workers=VIDEO_WORKERS) as executor:
+        results = list(executor.map(set_date, files_and_times))
+
+    errors = 0
+    for (filepath, _), error in zip(files_and_times, results):
+        if error is not None:
+            print(f"    [ERROR] AtomicParsley failed on {filepath.name}: {error}")
+            errors += 1
+    return len(files_and_times) - errors, errors
 
 
 def batch_set_timestamps(
-    files_and_times: list[tuple[Path, datetime]], dry_run: bool = False
+    files_and_times: list[tuple[Path, datetime]],
+    dry_run: bool = False,
+    set_birthtime: bool = False,
+    video_tool: str = "exiftool",
 ) -> tuple[int, int]:
     """
-    Set timestamps on multiple files in one exiftool call using argfile.
+    Set timestamps on multiple files, embedding them with exiftool (or
+    AtomicParsley for videos if video_tool is "atomicparsley").
     Returns (success_count, error_count).
     """
     if not files_and_times:
@@ -157,73 +608,99 @@ def batch_set_timestamps(
             print(f"    [DRY RUN] Would set {filepath.name} -> {exif_dt}")
         return len(files_and_times), 0
 
-    # Build argfile content
+    image_batch = files_and_times
+    video_batch = []
+    if video_tool == "atomicparsley":
+        image_batch = []
+        for item in files_and_times:
+            if item[0].suffix.lower() in VIDEO_EXTS:
+                video_batch.append(item)
+            else:
+                image_batch.append(item)
+
+    success, errors = exiftool_set_timestamps(image_batch)
+    if video_batch:
+        video_success, video_errors = atomicparsley_set_timestamps(video_batch)
+        success += video_success
+        errors += video_errors
+
+    # Filesystem times are set after the files have been rewritten
+    time_errors = set_file_times(files_and_times, set_birthtime)
+    success = max(0, success - time_errors)
+    errors += time_errors
+
+    return success, errors
+
+
+def exiftool_set_timestamps(
+    files_and_times: list[tuple[Path, datetime]],
+) -> tuple[int, int]:
+    """
+    Embed timestamps in multiple files in one exiftool daemon round trip.
+    Formats exiftool can't write are left to set_file_times and count as
+    successes.
+    Returns (success_count, error_count).
+    """
+    # Group by extension so each format gets only the tags it can hold,
+    # and exiftool handles one writer module at a time
+    groups: dict[str, list[tuple[Path, datetime]]] = {}
+    for item in files_and_times:
+        groups.setdefault(item[0].suffix.lower(), []).append(item)
+    filesystem_only = sum(len(groups.pop(ext, ())) for ext in UNWRITABLE_EXTS)
+    files_and_times = [item for group in groups.values() for item in group]
+
+    if not files_and_times:
+        return filesystem_only, 0
+
+    # Build argfile content straight into one buffer
     # Use -execute between each file to process them separately
     # (otherwise options accumulate and the last timestamp applies to all files)
-    argfile_lines = []
-    for filepath, dt in files_and_times:
-        exif_dt = format_exif_datetime(dt)
-        argfile_lines.extend(
-            [
-                "-overwrite_original",
-                f"-DateTimeOriginal={exif_dt}",
-                f"-CreateDate={exif_dt}",
-                f"-FileModifyDate={exif_dt}",
-                f"-FileCreateDate={exif_dt}",
-                str(filepath),
-                "-execute",
-            ]
-        )
+    argfile = bytearray()
+    write = argfile.extend
+    for ext, group in groups.items():
+        date_args = DATE_ARGS_BY_EXT.get(ext, _IMAGE_DATE_ARGS)
+        for filepath, dt in group:
+            exif_bytes = format_exif_datetime(dt).encode()
+            write(b"-overwrite_original\n")
+            for date_arg in date_args:
+                write(date_arg)
+                write(exif_bytes)
+                write(b"\n")
+            write(os.fsencode(filepath))
+            write(b"\n")
+            write(EXIFTOOL_EXECUTE)
+
+    # Live counter when attached to a terminal (album workers log to a buffer)
+    on_progress = None
+    if sys.stdout.isatty():
+        total = len(files_and_times)
 
-    try:
-        # Write argfile
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False
-        ) as argfile:
-            argfile.write("\n".join(argfile_lines))
-            argfile_path = argfile.name
-
-        # Run exiftool with argfile
-        result = subprocess.run(
-            ["exiftool", "-@", argfile_path],
-            capture_output=True,
-            text=True,
-            check=False,
-        )
+        def on_progress(done: int) -> None:
+            if done % 25 == 0 or done == total:
+                print(f"\r    {done}/{total}", end="", flush=True)
 
-        # Clean up argfile
-        Path(argfile_path).unlink()
+    try:
+        stdout, stderr = get_exiftool().execute_argfile(argfile, on_progress)
 
         # With -execute, exiftool outputs one summary per "command"
         # Count all "X image files updated" and "X image files unchanged" lines
         updated = 0
         unchanged = 0
-        for line in result.stdout.split("\n"):
-            line = line.strip()
-            if "image files updated" in line:
-                try:
-                    updated += int(line.split()[0])
-                except (ValueError, IndexError):
-                    pass
-            elif "image files unchanged" in line:
-                try:
-                    unchanged += int(line.split()[0])
-                except (ValueError, IndexError):
-                    pass
+        for match in _SUMMARY_RE.finditer(stdout):
+            if match.group(2) == "updated":
+                updated += int(match.group(1))
+            else:
+                unchanged += int(match.group(1))
 
         # Files are either updated, unchanged, or errored
         total = len(files_and_times)
         accounted_for = updated + unchanged
         error_count = total - accounted_for
 
-        # Report any errors from stderr (filter out expected FileCreateDate warnings)
-        if result.stderr:
-            stderr_lines = result.stderr.strip().split("\n")
-            real_errors = [
-                line
-                for line in stderr_lines
-                if line.strip() and "FileCreateDate" not in line
-            ]
+        # Report any errors from stderr
+        if stderr:
+            stderr_lines = stderr.strip().split("\n")
+            real_errors = [line for line in stderr_lines if line.strip()]
             if real_errors:
                 print(f"\n  [WARN] exiftool reported {len(real_errors)} warning(s):")
                 for err in real_errors[:5]:  # Show first 5
@@ -231,110 +708,216 @@ def batch_set_timestamps(
                 if len(real_errors) > 5:
                     print(f"    ... and {len(real_errors) - 5} more")
 
-        return updated + unchanged, error_count
+        return updated + unchanged + filesystem_only, error_count
 
     except FileNotFoundError:
         print("[ERROR] exiftool not found. Install with: brew install exiftool")
         sys.exit(1)
     except Exception as e:
         print(f"  [ERROR] Batch timestamp error: {e}")
-        return 0, len(files_and_times)
+        return filesystem_only, len(files_and_times)
 
 
-def process_album(
-    album_path: Path,
-    output_base: Path,
-    dry_run: bool = False,
-) -> tuple[int, int, int, int]:
+def _clone_file(src: Path, dst: Path) -> bool:
     """
-    Process all media files in an album using batch operations.
-    Returns (processed_count, skipped_count, error_count, renamed_count).
+    Try to clone src to dst without copying data (APFS, Btrfs, XFS).
+    Returns True on success, False if the filesystem can't do it.
     """
-    album_name = album_path.name
-    metadata_dir = album_path / "metadata"
-    output_dir = output_base / album_name
+    if _clonefile is not None:
+        return _clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    if fcntl is not None and sys.platform.startswith("linux"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            return False
+    return False
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """Copy src to dst with metadata, cloning where the filesystem allows."""
+    if _clone_file(src, dst):
+        shutil.copystat(src, dst)
+    else:
+        shutil.copy2(src, dst)
 
-    # Collect all media files (excluding metadata dir and .DS_Store)
-    media_files = []
-    for item in album_path.iterdir():
-        if item.name == "metadata" or item.name == ".DS_Store":
-            continue
-        if item.is_dir():
-            continue
-        media_files.append(item)
 
-    if not media_files:
-        print("  No media files found")
-        return 0, 0, 0, 0
+def _safe_copy(
+    src: Path, dst: Path, timestamp: datetime
+) -> tuple[Path, datetime, Optional[OSError]]:
+    """
+    Copy src to dst, capturing rather than raising copy errors.
+    Returns (dst, timestamp, error_or_none).
+    """
+    try:
+        _fast_copy(src, dst)
+    except OSError as e:
+        return dst, timestamp, e
+    return dst, timestamp, None
 
-    # Step 1: Batch detect all file types
-    print(f"  Detecting file types for {len(media_files)} files...")
-    file_types = batch_detect_file_types(media_files)
 
-    # Step 2: Process each file - read metadata and prepare for copy
-    print("  Reading metadata...")
-    files_to_process: list[tuple[Path, Path, datetime]] = []  # (src, dst, timestamp)
+def _load_sidecar(json_file: Path) -> tuple[Optional[dict], Optional[Exception]]:
+    """
+    Read and parse a metadata JSON file, capturing rather than raising errors.
+    Returns (metadata_or_none, error_or_none).
+    """
+    try:
+        return _json_loads(json_file.read_bytes()), None
+    except (ValueError, OSError) as e:
+        return None, e
+
+
+def plan_album(
+    media_files: list[Path],
+    file_types: dict[str, Optional[str]],
+    metadata_dir: Path,
+    output_dir: Path,
+) -> tuple[list[Path], list[Path], list[datetime], int, int, int]:
+    """
+    Work out where each media file goes and which timestamp it gets.
+    The plan is returned as parallel lists rather than a tuple per file.
+    Returns (srcs, dsts, timestamps, skipped_count, error_count, renamed_count).
+    """
+    srcs: list[Path] = []
+    dsts: list[Path] = []
+    timestamps: list[datetime] = []
     skipped = 0
     errors = 0
     renamed = 0
 
-    # Create output directory
-    if not dry_run:
-        output_dir.mkdir(parents=True, exist_ok=True)
+    # List the metadata folder once instead of stat-ing each sidecar
+    metadata_names = _list_dir_names(metadata_dir)
+
+    # Load every sidecar up front, overlapping the many small reads
+    json_names = [
+        f"{media_file.name}.json"
+        for media_file in media_files
+        if f"{media_file.name}.json" in metadata_names
+    ]
+    with ThreadPoolExecutor(max_workers=METADATA_READ_WORKERS) as executor:
+        sidecars = dict(
+            zip(
+                json_names,
+                executor.map(_load_sidecar, (metadata_dir / n for n in json_names)),
+            )
+        )
 
     for media_file in media_files:
-        json_file = metadata_dir / f"{media_file.name}.json"
+        name = media_file.name
 
-        # Check for metadata JSON
-        if not json_file.exists():
-            print(f"    [SKIP] No metadata: {media_file.name}")
+        # Check for metadata JSON (a sidecar removed since listing is missing too)
+        metadata, error = sidecars.get(f"{name}.json", (None, None))
+        if metadata is None and (error is None or isinstance(error, FileNotFoundError)):
+            print(f"    [SKIP] No metadata: {name}")
             skipped += 1
             continue
 
-        # Parse metadata
-        try:
-            with open(json_file, "r") as f:
-                metadata = json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"    [ERROR] Failed to read metadata for {media_file.name}: {e}")
+        if error is not None:
+            print(f"    [ERROR] Failed to read metadata for {name}: {error}")
             errors += 1
             continue
 
         # Extract timestamp
         timestamp = parse_timestamp(metadata)
         if timestamp is None:
-            print(f"    [SKIP] No timestamp: {media_file.name}")
+            print(f"    [SKIP] No timestamp: {name}")
             skipped += 1
             continue
 
         # Get corrected filename
-        detected_ext = file_types.get(media_file.name)
-        corrected_name, was_corrected = get_corrected_filename(media_file, detected_ext)
+        corrected_name, was_corrected = get_corrected_filename(
+            media_file, file_types.get(name)
+        )
         if was_corrected:
-            print(f"    [FIX] {media_file.name} -> {corrected_name}")
+            print(f"    [FIX] {name} -> {corrected_name}")
             renamed += 1
 
-        output_file = output_dir / corrected_name
-        files_to_process.append((media_file, output_file, timestamp))
+        srcs.append(media_file)
+        dsts.append(output_dir / corrected_name)
+        timestamps.append(timestamp)
+
+    return srcs, dsts, timestamps, skipped, errors, renamed
+
+
+def process_album(
+    album_path: Path,
+    output_base: Path,
+    dry_run: bool = False,
+    cache_db: Optional[Path] = None,
+    set_birthtime: bool = False,
+    video_tool: str = "exiftool",
+) -> tuple[int, int, int, int]:
+    """
+    Process all media files in an album using batch operations.
+    Detected file types are cached in cache_db when given.
+    Returns (processed_count, skipped_count, error_count, renamed_count).
+    """
+    album_name = album_path.name
+    metadata_dir = album_path / "metadata"
+    output_dir = output_base / album_name
+
+    # Collect all media files (excluding metadata dir and .DS_Store)
+    # scandir's DirEntry answers is_dir() from readdir without another stat
+    media_files = []
+    with os.scandir(album_path) as entries:
+        for entry in entries:
+            if entry.name == "metadata" or entry.name == ".DS_Store":
+                continue
+            if entry.is_dir():
+                continue
+            media_files.append(Path(entry.path))
 
-    if not files_to_process:
+    if not media_files:
+        print("  No media files found")
+        return 0, 0, 0, 0
+
+    # Step 1: Detect file types. Most files already have the right extension,
+    # which the magic bytes confirm; only the rest need exiftool. A dry run
+    # doesn't start exiftool, so it leaves unconfirmed files unrenamed
+    file_types: dict[str, Optional[str]] = {}
+    unresolved = []
+    for media_file in media_files:
+        sniffed_ext = quick_sniff(media_file)
+        if sniffed_ext and not get_corrected_filename(media_file, sniffed_ext)[1]:
+            file_types[media_file.name] = sniffed_ext
+        elif not dry_run:
+            unresolved.append(media_file)
+
+    file_types.update(cached_detect_file_types(unresolved, cache_db))
+
+    # Step 2: Process each file - read metadata and prepare for copy
+    print("  Reading metadata...")
+
+    # Create output directory
+    if not dry_run:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    srcs, dsts, timestamps, skipped, errors, renamed = plan_album(
+        media_files, file_types, metadata_dir, output_dir
+    )
+
+    if not srcs:
         return 0, skipped, errors, renamed
 
     # Step 3: Copy all files
-    print(f"  Copying {len(files_to_process)} files...")
+    print(f"  Copying {len(srcs)} files...")
     files_for_timestamps: list[tuple[Path, datetime]] = []
 
-    for src, dst, timestamp in files_to_process:
-        if not dry_run:
-            try:
-                shutil.copy2(src, dst)
+    if not dry_run:
+        # Copies are I/O bound and release the GIL, so overlap them
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+            results = list(executor.map(_safe_copy, srcs, dsts, timestamps))
+        for src, (dst, timestamp, error) in zip(srcs, results):
+            if error is None:
                 files_for_timestamps.append((dst, timestamp))
-            except IOError as e:
-                print(f"    [ERROR] Failed to copy {src.name}: {e}")
+            else:
+                print(f"    [ERROR] Failed to copy {src.name}: {error}")
                 errors += 1
-        else:
+    else:
+        for src in srcs:
             print(f"    [DRY RUN] Would copy: {src.name}")
-            files_for_timestamps.append((dst, timestamp))
+        files_for_timestamps = list(zip(dsts, timestamps))
 
     # Step 4: Batch set timestamps
     if files_for_timestamps:
@@ -343,7 +926,9 @@ def process_album(
             end="",
             flush=True,
         )
-        success, ts_errors = batch_set_timestamps(files_for_timestamps, dry_run)
+        success, ts_errors = batch_set_timestamps(
+            files_for_timestamps, dry_run, set_birthtime, video_tool
+        )
         print(" done." if not dry_run else "")
         errors += ts_errors
         processed = success
@@ -353,19 +938,64 @@ def process_album(
     return processed, skipped, errors, renamed
 
 
+def _init_worker() -> None:
+    """Set up an album worker process."""
+    # atexit hooks don't run in pool workers, multiprocessing finalizers do
+    multiprocessing.util.Finalize(None, close_exiftool, exitpriority=0)
+
+
+def _process_album_job(
+    album_path: Path,
+    output_base: Path,
+    dry_run: bool = False,
+    cache_db: Optional[Path] = None,
+    set_birthtime: bool = False,
+    video_tool: str = "exiftool",
+) -> tuple[str, tuple[int, int, int, int]]:
+    """
+    Run process_album in a worker, capturing its output so albums finishing
+    in parallel don't interleave their logs.
+    Returns (log, counts).
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        print(f"Album: {album_path.name}")
+        counts = process_album(
+            album_path, output_base, dry_run, cache_db, set_birthtime, video_tool
+        )
+    return log.getvalue(), counts
+
+
+def _list_dir_names(directory: Path) -> set[str]:
+    """Return the entry names in a directory, or an empty set if it's missing."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def _has_content(directory: str) -> bool:
+    """Check if a directory looks like an album (has files or metadata folder)."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name == "metadata" and entry.is_dir():
+                return True
+            if entry.name != ".DS_Store" and entry.is_file():
+                return True
+    return False
+
+
 def find_albums(input_dir: Path) -> list[Path]:
     """Find all album directories (top-level subdirectories)."""
-    albums = []
-    for item in input_dir.iterdir():
-        if item.is_dir() and not item.name.startswith("."):
-            # Check if it looks like an album (has files or metadata folder)
-            has_files = any(
-                f.is_file() and f.name != ".DS_Store" for f in item.iterdir()
-            )
-            has_metadata = (item / "metadata").is_dir()
-            if has_files or has_metadata:
-                albums.append(item)
-    return sorted(albums)
+    with os.scandir(input_dir) as entries:
+        return sorted(
+            Path(entry.path)
+            for entry in entries
+            if not entry.name.startswith(".")
+            and entry.is_dir()
+            and _has_content(entry.path)
+        )
 
 
 def main():
@@ -387,13 +1017,55 @@ The script expects the input directory to contain album folders, each with:
     parser.add_argument(
         "--dry-run",
         action="store_true",
-        help="Show what would be done without making changes",
+        help=(
+            "Show what would be done without making changes. Skips exiftool "
+            "type detection, so extension fixes are not previewed (a real run "
+            "may rename files the preview leaves alone)"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 2),
+        metavar="N",
+        help="Number of albums to process in parallel (default: half the CPUs)",
+    )
+
+    parser.add_argument(
+        "--set-birthtime",
+        action="store_true",
+        help="Also set file creation dates (macOS only, needs SetFile)",
+    )
+    parser.add_argument(
+        "--video-tool",
+        choices=["exiftool", "atomicparsley"],
+        default="exiftool",
+        help=(
+            "Tool used to date MP4/MOV files (default: exiftool). atomicparsley "
+            "is faster but only writes the iTunes ©day date, not the "
+            "QuickTime CreateDate most photo apps read"
+        ),
+    )
+    parser.add_argument(
+        "--cache-db",
+        default=DEFAULT_CACHE_DB,
+        metavar="PATH",
+        help=f"File type cache, reused across runs (default: {DEFAULT_CACHE_DB})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the file type cache",
     )
 
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     input_path = Path(args.input_dir).expanduser().resolve()
     output_path = Path(args.output_dir).expanduser().resolve()
+    cache_db = None if args.no_cache else Path(args.cache_db).expanduser()
 
     if not input_path.exists():
         print(f"[ERROR] Input directory does not exist: {input_path}")
@@ -409,6 +1081,21 @@ The script expects the input directory to contain album folders, each with:
         print(f"[ERROR] No albums found in: {input_path}")
         sys.exit(1)
 
+    # Check up front: a worker exiting mid-album would lose its log
+    if not args.dry_run and shutil.which("exiftool") is None:
+        print("[ERROR] exiftool not found. Install with: brew install exiftool")
+        sys.exit(1)
+    if (
+        not args.dry_run
+        and args.video_tool == "atomicparsley"
+        and shutil.which("AtomicParsley") is None
+    ):
+        print(
+            "[ERROR] AtomicParsley not found. "
+            "Install with: brew install atomicparsley"
+        )
+        sys.exit(1)
+
     print(f"Found {len(albums)} album(s) to process")
     print(f"Input:  {input_path}")
     print(f"Output: {output_path}")
@@ -426,16 +1113,48 @@ The script expects the input directory to contain album folders, each with:
     total_errors = 0
     total_renamed = 0
 
-    for album in albums:
-        print(f"Album: {album.name}")
-        processed, skipped, errors, renamed = process_album(
-            album, output_path, args.dry_run
-        )
-        total_processed += processed
-        total_skipped += skipped
-        total_errors += errors
-        total_renamed += renamed
-        print()
+    jobs = min(args.jobs, len(albums))
+    if jobs == 1:
+        for album in albums:
+            print(f"Album: {album.name}")
+            processed, skipped, errors, renamed = process_album(
+                album,
+                output_path,
+                args.dry_run,
+                cache_db,
+                args.set_birthtime,
+                args.video_tool,
+            )
+            total_processed += processed
+            total_skipped += skipped
+            total_errors += errors
+            total_renamed += renamed
+            print()
+    else:
+        # Albums write to disjoint output folders, so they can run in
+        # parallel; each worker starts its own exiftool daemon on first use
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _process_album_job,
+                    album,
+                    output_path,
+                    args.dry_run,
+                    cache_db,
+                    args.set_birthtime,
+                    args.video_tool,
+                )
+                for album in albums
+            ]
+            for future in as_completed(futures):
+                log, (processed, skipped, errors, renamed) = future.result()
+                print(log)
+                total_processed += processed
+                total_skipped += skipped
+                total_errors += errors
+                total_renamed += renamed
 
     # Summary
     print("=" * 50)